@@ -1,11 +1,20 @@
 """Provides executors that enable delayed and/or recurring tasks."""
 
 from scheduledexecutor.base import *
+from scheduledexecutor.cache import *
 from scheduledexecutor.process import *
+from scheduledexecutor.sharded import *
+from scheduledexecutor.store import *
 from scheduledexecutor.thread import *
+from scheduledexecutor.trace import *
 
 __all__ = (
     "ScheduledFuture",
+    "ExecutionTimeoutError",
     "ThreadPoolExecutor",
     "ProcessPoolExecutor",
+    "ShardedProcessPoolExecutor",
+    "RefreshingValue",
+    "ScheduleStore",
+    "Tracer",
 )
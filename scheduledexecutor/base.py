@@ -1,10 +1,17 @@
 """Provides base classes and functions."""
 
 import heapq
+import itertools
+import logging
 import queue
 import threading
 import time
 from concurrent import futures
+from typing import Any, Callable, Iterable, Optional
+
+from scheduledexecutor import trace
+
+_logger = logging.getLogger(__name__)
 
 
 class ScheduledFuture(futures.Future):
@@ -13,6 +20,12 @@ class ScheduledFuture(futures.Future):
     pass
 
 
+class ExecutionTimeoutError(futures.TimeoutError):
+    """Raised when a run of a scheduled task exceeds its execution timeout."""
+
+    pass
+
+
 class DelayQueue(queue.Queue):
     """Implements a simple DelayQueue on top of :class:`queue.Queue`,
     in which an element can only be taken when its delay has expired.
@@ -27,13 +40,53 @@ class DelayQueue(queue.Queue):
         self.all_tasks_done = threading.Condition(self.mutex)
 
         self.queue = []
+        self._counter = itertools.count()
+
+        self.tracer: Optional[trace.Tracer] = None
 
     def _put(self, item):
+        if self.tracer is not None and item:
+            self.tracer.record(trace.ENQUEUE, id(item), getattr(item, "fn", item))
+
         item_time = item.trigger_time if item else 0.0
-        heapq.heappush(self.queue, (item_time, item))
+        # the counter keeps items with the same trigger time in FIFO order
+        # without ever comparing the items themselves.
+        heapq.heappush(self.queue, (item_time, next(self._counter), item))
 
     def _get(self):
-        return heapq.heappop(self.queue)[1]
+        return heapq.heappop(self.queue)[-1]
+
+    def put_all(self, items: Iterable) -> None:
+        """Puts all the items at once, heapifying them in linear time."""
+        if self.maxsize > 0:
+            for item in items:
+                self.put(item)
+            return
+
+        with self.mutex:
+            if self.tracer is not None:
+                items = list(items)
+                for item in items:
+                    self.tracer.record(
+                        trace.ENQUEUE, id(item), getattr(item, "fn", item)
+                    )
+
+            n = len(self.queue)
+            self.queue.extend(
+                (item.trigger_time, next(self._counter), item) for item in items
+            )
+            heapq.heapify(self.queue)
+            self.unfinished_tasks += len(self.queue) - n
+            self.not_empty.notify_all()
+
+    def remove_all(self, predicate: Callable[[Any], bool]) -> int:
+        """Removes the items matching ``predicate``, returning how many were removed."""
+        with self.mutex:
+            n = len(self.queue)
+            self.queue = [e for e in self.queue if not (e[-1] and predicate(e[-1]))]
+            heapq.heapify(self.queue)
+            self.unfinished_tasks -= n - len(self.queue)
+            return n - len(self.queue)
 
     def get(self, block=True, timeout=None):
         deadline = time.time() + timeout if timeout is not None else None
@@ -51,7 +104,7 @@ class DelayQueue(queue.Queue):
                         self.not_empty.wait(remaining)
                     continue
 
-                head = self.queue[0][1]
+                head = self.queue[0][-1]
                 delay = head.delay() if head else 0.0
                 if delay > 0.0:
                     if not block:
@@ -66,4 +119,141 @@ class DelayQueue(queue.Queue):
                 else:
                     item = self._get()
                     self.not_full.notify()
+                    if self.tracer is not None and item:
+                        fn = getattr(item, "fn", item)
+                        self.tracer.record(trace.DUE, id(item), fn, item.trigger_time)
+                        self.tracer.record(trace.DEQUEUE, id(item), fn)
                     return item
+
+
+_ARMED = "ARMED"
+_DISARMED = "DISARMED"
+_FIRED = "FIRED"
+
+# the least number of disarmed entries for which the watchdog queue is compacted.
+_COMPACTION_THRESHOLD = 64
+
+
+class WatchdogEntry:
+    """A deadline registered with :class:`Watchdog`.
+
+    The callback is invoked once the deadline expires unless the entry has been
+    disarmed before. It may return a delay in seconds to be re-armed instead of
+    firing.
+    """
+
+    def __init__(
+        self,
+        trigger_time: float,
+        callback: Callable[[], Optional[float]],
+        on_disarm: Optional[Callable[[], None]] = None,
+    ):
+        self.trigger_time: float = trigger_time
+        self.callback: Optional[Callable[[], Optional[float]]] = callback
+        self._on_disarm: Optional[Callable[[], None]] = on_disarm
+
+        self._lock = threading.Lock()
+        self._state = _ARMED
+
+    def delay(self) -> float:
+        return self.trigger_time - time.time()
+
+    def disarm(self) -> bool:
+        """Disarms the entry, returning ``False`` if it has already fired."""
+        with self._lock:
+            if self._state is not _ARMED:
+                return False
+
+            self._state = _DISARMED
+            # the callback may hold on to a whole task until the deadline.
+            self.callback = None
+
+        if self._on_disarm is not None:
+            self._on_disarm()
+        return True
+
+    def disarmed(self) -> bool:
+        return self._state is _DISARMED
+
+    def fire(self) -> Optional[float]:
+        with self._lock:
+            if self._state is not _ARMED:
+                return None
+
+            delay = None
+            try:
+                delay = self.callback()
+            finally:
+                if delay is None:
+                    self._state = _FIRED
+            return delay
+
+
+class Watchdog:
+    """Invokes the callbacks of expired :class:`WatchdogEntry` on a daemon thread."""
+
+    def __init__(self, name: str = "Watchdog"):
+        self._name: str = name
+        self._queue: DelayQueue = DelayQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._disarmed_count: int = 0
+
+    def watch(
+        self, timeout: float, callback: Callable[[], Optional[float]]
+    ) -> WatchdogEntry:
+        entry = WatchdogEntry(time.time() + timeout, callback, self._on_disarm)
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self._name, daemon=True
+                )
+                self._thread.start()
+
+            self._queue.put(entry)
+
+        return entry
+
+    def _on_disarm(self) -> None:
+        # Disarmed entries would otherwise stay queued until their deadlines, so
+        # the queue is compacted once they make up most of it.
+        with self._queue.mutex:
+            self._disarmed_count += 1
+            if (
+                self._disarmed_count >= _COMPACTION_THRESHOLD
+                and self._disarmed_count * 2 >= self._queue.qsize()
+            ):
+                self._disarmed_count -= self._queue.remove_all(
+                    lambda entry: entry.disarmed()
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+
+            self._queue.put(None)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+
+            if entry.disarmed():
+                with self._queue.mutex:
+                    self._disarmed_count -= 1
+                continue
+
+            callback = entry.callback
+            try:
+                delay = entry.fire()
+            except Exception:  # pylint:disable=broad-except
+                _logger.exception("watchdog callback %r failed", callback)
+                continue
+
+            if delay is not None:
+                entry.trigger_time = time.time() + delay
+                self._queue.put(entry)
@@ -0,0 +1,137 @@
+"""Provides :class:`RefreshingValue`."""
+
+import threading
+import time
+from concurrent import futures
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+from scheduledexecutor import base, thread
+
+
+class _Entry(NamedTuple):
+    value: Any
+    refreshed_at: float
+
+
+class RefreshingValue:
+    """Keeps the result of ``fn`` refreshed on a :class:`scheduledexecutor.ThreadPoolExecutor`.
+
+    ``fn`` is called every ``period`` seconds at a fixed rate, or ``delay`` seconds
+    after each call completes. Readers get the last good value without taking a
+    lock. A value older than ``max_age`` seconds is still served, but triggers a
+    refresh on demand. Concurrent refreshes are deduplicated into one call, and a
+    failed refresh keeps the previous value.
+    """
+
+    def __init__(
+        self,
+        executor: thread.ThreadPoolExecutor,
+        fn: Callable[[], Any],
+        *,
+        period: Optional[float] = None,
+        delay: Optional[float] = None,
+        initial_delay: float = 0.0,
+        max_age: Optional[float] = None,
+    ):
+        if (period is None) == (delay is None):
+            raise ValueError("exactly one of period and delay must be given")
+        if max_age is not None and max_age <= 0.0:
+            raise ValueError(f"max_age must be > 0, not {max_age}")
+
+        self._executor: thread.ThreadPoolExecutor = executor
+        self._fn: Callable[[], Any] = fn
+        self._max_age: Optional[float] = max_age
+
+        self._entry: Optional[_Entry] = None
+        self._last_error: Optional[BaseException] = None
+
+        self._lock = threading.Lock()
+        self._pending: Optional[futures.Future] = None
+
+        if period is not None:
+            self._future: base.ScheduledFuture = executor.schedule_at_fixed_rate(
+                initial_delay, period, self._tick
+            )
+        else:
+            self._future = executor.schedule_at_fixed_delay(
+                initial_delay, delay, self._tick
+            )
+
+    def _begin(self) -> Tuple[futures.Future, bool]:
+        """Returns the refresh in flight, or a new one and ``True`` if none is."""
+        with self._lock:
+            if self._pending is not None:
+                return self._pending, False
+
+            self._pending = futures.Future()
+            self._pending.set_running_or_notify_cancel()
+            return self._pending, True
+
+    def _run(self, f: futures.Future) -> None:
+        try:
+            value = self._fn()
+        except Exception as e:  # pylint:disable=broad-except
+            self._last_error = e
+            with self._lock:
+                self._pending = None
+            f.set_exception(e)
+        else:
+            self._entry = _Entry(value, time.time())
+            self._last_error = None
+            with self._lock:
+                self._pending = None
+            f.set_result(value)
+
+    def _tick(self) -> None:
+        # errors are kept in last_error; raising would end the schedule.
+        f, is_new = self._begin()
+        if is_new:
+            self._run(f)
+
+    def refresh(self) -> futures.Future:
+        """Refreshes the value, joining the refresh in flight if any."""
+        f, is_new = self._begin()
+        if is_new:
+            try:
+                self._executor.submit(self._run, f)
+            except Exception as e:
+                with self._lock:
+                    self._pending = None
+                f.set_exception(e)
+                raise
+
+        return f
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Returns the last good value.
+
+        Waits up to ``timeout`` seconds if no value has been computed yet.
+        """
+        entry = self._entry
+        if entry is None:
+            return self.refresh().result(timeout)
+
+        if (
+            self._max_age is not None
+            and time.time() - entry.refreshed_at > self._max_age
+        ):
+            try:
+                self.refresh()
+            except Exception as e:  # pylint:disable=broad-except
+                # the stale value is still served, e.g. after shutdown.
+                self._last_error = e
+
+        return entry.value
+
+    def cancel(self) -> bool:
+        """Stops refreshing the value; the last good value is still served."""
+        return self._future.cancel()
+
+    @property
+    def age(self) -> Optional[float]:
+        entry = self._entry
+        return None if entry is None else time.time() - entry.refreshed_at
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        return self._last_error
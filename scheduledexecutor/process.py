@@ -1,10 +1,32 @@
 """Provides :class:`ProcessPoolExecutor`."""
 
+import functools
+import itertools
+import multiprocessing
+import os
+import threading
+import time
 from concurrent import futures
-from concurrent.futures import process
-from typing import Any, Callable, Dict, Tuple, Union
+from concurrent.futures import _base, process
+from typing import Any, Callable, Collection, Dict, Optional, Tuple, Union
 
-from scheduledexecutor import base, thread
+from scheduledexecutor import base, thread, trace
+
+# set in each worker process by _init_worker
+_started_queue = None
+
+
+def _init_worker(started_queue, initializer, initargs):
+    global _started_queue
+    _started_queue = started_queue
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_reporting_start(token: int, fn: Callable, args, kwargs):
+    _started_queue.put((token, os.getpid(), time.time()))
+    return fn(*args, **kwargs)
 
 
 class _ScheduledFuture(base.ScheduledFuture):
@@ -19,7 +41,14 @@ class _ScheduledFuture(base.ScheduledFuture):
         if self.future:
             self.future.cancel()
 
-        return super().cancel()
+        with self._condition:
+            if not super().cancel():
+                return False
+
+            # nothing else would notify the waiters, since the future never runs.
+            if self._state == _base.CANCELLED:
+                self.set_running_or_notify_cancel()
+            return True
 
 
 def _tf_done_callback(future: base.ScheduledFuture):
@@ -27,7 +56,7 @@ def _tf_done_callback(future: base.ScheduledFuture):
         try:
             tf.result()
         except futures.CancelledError:
-            pass
+            future.cancel()
         except Exception as e:  # pylint:disable=broad-except
             future.set_exception(e)
 
@@ -35,17 +64,79 @@ def _tf_done_callback(future: base.ScheduledFuture):
 
 
 class ProcessPoolExecutor:
-    """Extends :class:`concurrent.futures.ProcessPoolExecutor` to enable delayed and/or recurring tasks."""
+    """Extends :class:`concurrent.futures.ProcessPoolExecutor` to enable delayed and/or recurring tasks.
+
+    Killing a worker process that overruns its ``execution_timeout`` breaks the
+    underlying :class:`concurrent.futures.ProcessPoolExecutor`, which is then
+    replaced as a whole. Tasks of the old pool that had not started yet are
+    submitted again to the new one. Tasks that were running are not run again:
+    a one-shot task fails with :class:`concurrent.futures.process.BrokenProcessPool`,
+    and a periodic one skips that run. Tasks submitted before the first task
+    with an ``execution_timeout`` do not report when they start, and are taken
+    as running.
+    """
 
     def __init__(
         self, max_workers=None, mp_context=None, initializer=None, initargs=()
     ):
 
+        if mp_context is None:
+            mp_context = multiprocessing.get_context()
+
+        # Once a task has an execution timeout, worker processes report which of
+        # them started which task, so that the watchdog knows which one to kill,
+        # and so that the tasks interrupted along with it can be told from the
+        # ones that never started.
+        self._reporting: bool = False
+        self._started: Dict[int, Tuple[int, float]] = {}
+        self._started_lock = threading.Lock()
+        self._tokens = itertools.count()
+
         self._thread_executor: thread.ThreadPoolExecutor = thread.ThreadPoolExecutor(1)
+        self._process_executor_args = (max_workers, mp_context, initializer, initargs)
+        self._process_executor_lock = threading.Lock()
+        self._new_process_executor()
+
+        self._watchdog: base.Watchdog = base.Watchdog("ProcessPoolExecutor_watchdog")
+        self._overrun_count: int = 0
+
+        self._tracer: Optional[trace.Tracer] = None
+
+    def _new_process_executor(self) -> None:
+        # Each pool gets a queue of its own: the workers terminated along with a
+        # killed one may leave the lock of their queue held.
+        max_workers, mp_context, initializer, initargs = self._process_executor_args
+        self._started_queue = mp_context.SimpleQueue()
         self._process_executor: process.ProcessPoolExecutor = (
-            process.ProcessPoolExecutor(max_workers, mp_context, initializer, initargs)
+            process.ProcessPoolExecutor(
+                max_workers,
+                mp_context,
+                _init_worker,
+                (self._started_queue, initializer, initargs),
+            )
         )
 
+    def _pop_started(self, started_queue, token: int) -> Optional[Tuple[int, float]]:
+        with self._started_lock:
+            while not started_queue.empty():
+                t, pid, start_time = started_queue.get()
+                self._started[t] = (pid, start_time)
+            return self._started.pop(token, None)
+
+    def _kill_worker(self, pe: process.ProcessPoolExecutor, pid: int) -> None:
+        # Killing a worker breaks the whole pool, so a fresh one takes its place
+        # before the stuck worker is killed. See pf_done_callback in _make_task
+        # for what happens to the other tasks of the old pool.
+        with self._process_executor_lock:
+            if self._process_executor is pe:
+                self._new_process_executor()
+
+        # pylint: disable=protected-access
+        p = (pe._processes or {}).get(pid)
+        if p is not None:
+            p.kill()
+        pe.shutdown(wait=False)
+
     def _make_task(
         self,
         future: base.ScheduledFuture,
@@ -53,60 +144,240 @@ class ProcessPoolExecutor:
         fn: Callable,
         args: Tuple[Any, ...],
         kwargs: Dict[str, Any],
+        *,
+        timeout: Optional[float] = None,
     ):
-        def pf_done_callback(pf: futures.Future):
-            try:
-                result = pf.result()
-                if not is_periodic:
-                    future.set_result(result)
-            except futures.CancelledError:
-                pass
-            except Exception as e:  # pylint:disable=broad-except
-                future.set_exception(e)
-                if is_periodic and hasattr(future, "future"):
-                    future.future.set_exception(e)
+        if timeout is not None:
+            self._reporting = True
+
+        def make_pf_done_callback(
+            pe: process.ProcessPoolExecutor,
+            started_queue,
+            token: Optional[int],
+            entry: Optional[base.WatchdogEntry],
+        ):
+            def pf_done_callback(pf: futures.Future):
+                if entry is not None and not entry.disarm():
+                    # the run has overrun and been dealt with by the watchdog.
+                    return
+                started = (
+                    None if token is None else self._pop_started(started_queue, token)
+                )
+
+                try:
+                    result = pf.result()
+                    if not is_periodic:
+                        future.set_result(result)
+                except futures.CancelledError:
+                    pass
+                except process.BrokenProcessPool as e:
+                    if pe is not self._process_executor:
+                        # The pool was broken on purpose to kill an overrunning
+                        # task. A task that never started is submitted again to
+                        # the new pool. A periodic task that was interrupted
+                        # skips this run, and a one-shot one fails.
+                        if token is not None and started is None:
+                            wrapper()
+                            return
+                        if is_periodic:
+                            return
+                        e = process.BrokenProcessPool(
+                            "task was interrupted when an overrunning worker"
+                            " process was killed"
+                        )
+
+                    future.set_exception(e)
+                    if is_periodic and hasattr(future, "future"):
+                        future.future.set_exception(e)
+                except Exception as e:  # pylint:disable=broad-except
+                    future.set_exception(e)
+                    if is_periodic and hasattr(future, "future"):
+                        future.future.set_exception(e)
+
+            return pf_done_callback
+
+        def make_on_overrun(pe: process.ProcessPoolExecutor, started_queue, token: int):
+            started = None
+
+            def on_overrun() -> Optional[float]:
+                nonlocal started
+                if started is None:
+                    started = self._pop_started(started_queue, token)
+                    if started is None:
+                        # still waiting for a worker process.
+                        return timeout
+
+                pid, start_time = started
+                remaining = start_time + timeout - time.time()
+                if remaining > 0.0:
+                    return remaining
+
+                self._overrun_count += 1
+                self._kill_worker(pe, pid)
 
+                if not is_periodic:
+                    future.set_exception(
+                        base.ExecutionTimeoutError(
+                            f"task did not complete within {timeout} seconds"
+                        )
+                    )
+
+            return on_overrun
+
+        def submit():
+            token = next(self._tokens) if self._reporting else None
+            while True:
+                with self._process_executor_lock:
+                    pe, started_queue = self._process_executor, self._started_queue
+                try:
+                    if token is None:
+                        pf = pe.submit(fn, *args, **kwargs)
+                    else:
+                        pf = pe.submit(_run_reporting_start, token, fn, args, kwargs)
+                    if timeout is None:
+                        return pe, started_queue, token, None, pf
+
+                    entry = self._watchdog.watch(
+                        timeout, make_on_overrun(pe, started_queue, token)
+                    )
+                    return pe, started_queue, token, entry, pf
+                except (process.BrokenProcessPool, RuntimeError):
+                    # retry only if the pool has just been replaced.
+                    if pe is self._process_executor:
+                        raise
+
+        @functools.wraps(fn)
         def wrapper():
-            pf = self._process_executor.submit(fn, *args, **kwargs)
-            pf.add_done_callback(pf_done_callback)
+            pe, started_queue, token, entry, pf = submit()
+
+            tracer = self._tracer
+            if tracer is not None:
+                # recorded under the id of the thread work item dispatching the
+                # run, so that it matches its enqueue, due, dequeue and run events.
+                # pylint: disable=protected-access
+                task_id = thread._current_task_id() or token
+                dispatched_at = time.time()
+                tracer.record(trace.DISPATCH, task_id, fn, dispatched_at)
+
+                def trace_done_callback(_):
+                    tracer.record(
+                        trace.PROCESS, task_id, fn, dispatched_at, time.time()
+                    )
+
+                pf.add_done_callback(trace_done_callback)
+
+            pf.add_done_callback(make_pf_done_callback(pe, started_queue, token, entry))
 
         return wrapper
 
     def schedule(
-        self, delay: float, fn: Callable, *args, **kwargs
+        self,
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
+        """Runs ``fn`` once after ``delay`` seconds.
+
+        If the run exceeds ``execution_timeout`` seconds, its worker process is
+        killed and replaced, and the returned future fails with
+        :class:`scheduledexecutor.base.ExecutionTimeoutError`.
+        """
+        if execution_timeout is not None and execution_timeout <= 0.0:
+            raise ValueError(f"execution_timeout must be > 0, not {execution_timeout}")
 
         sf = _ScheduledFuture()
         sf.future = self._thread_executor.schedule(
-            delay, self._make_task(sf, False, fn, args, kwargs)
+            delay,
+            self._make_task(sf, False, fn, args, kwargs, timeout=execution_timeout),
+        )
+        sf.future.add_done_callback(_tf_done_callback(sf))
+
+        return sf
+
+    def schedule_after(
+        self,
+        fs: Collection[futures.Future],
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> base.ScheduledFuture:
+        """Runs ``fn`` once, ``delay`` seconds after all the futures in ``fs`` complete.
+
+        If any of them fails or is cancelled, the returned future fails or is
+        cancelled likewise without running ``fn``. The returned future may itself
+        be given to another :meth:`schedule_after` to build a graph of tasks.
+        """
+        if execution_timeout is not None and execution_timeout <= 0.0:
+            raise ValueError(f"execution_timeout must be > 0, not {execution_timeout}")
+
+        sf = _ScheduledFuture()
+        sf.future = self._thread_executor.schedule_after(
+            fs,
+            delay,
+            self._make_task(sf, False, fn, args, kwargs, timeout=execution_timeout),
         )
         sf.future.add_done_callback(_tf_done_callback(sf))
 
         return sf
 
     def schedule_at_fixed_rate(
-        self, initial_delay: float, period: float, fn: Callable, *args, **kwargs
+        self,
+        initial_delay: float,
+        period: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
+        """Runs ``fn`` every ``period`` seconds after ``initial_delay`` seconds.
+
+        If a run exceeds ``execution_timeout`` seconds, its worker process is
+        killed and replaced, and the run is skipped and counted in
+        :attr:`overrun_count`.
+        """
+        if execution_timeout is not None and execution_timeout <= 0.0:
+            raise ValueError(f"execution_timeout must be > 0, not {execution_timeout}")
 
         sf = _ScheduledFuture()
         sf.future = self._thread_executor.schedule_at_fixed_rate(
-            initial_delay, period, self._make_task(sf, True, fn, args, kwargs)
+            initial_delay,
+            period,
+            self._make_task(sf, True, fn, args, kwargs, timeout=execution_timeout),
         )
         sf.future.add_done_callback(_tf_done_callback(sf))
 
         return sf
 
     def schedule_at_fixed_delay(
-        self, initial_delay: float, delay: float, fn: Callable, *args, **kwargs
+        self,
+        initial_delay: float,
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
+        """Runs ``fn`` repeatedly, ``delay`` seconds after each run completes.
 
+        If a run exceeds ``execution_timeout`` seconds, its worker process is
+        killed and replaced, and the run is skipped and counted in
+        :attr:`overrun_count`.
+        """
         if delay <= 0.0:
             raise ValueError(f"delay must be > 0, not {delay}")
 
         def done_callback(f):
             try:
-                f.result()
-                sf.future = self.schedule(delay, fn, *args, **kwargs)
+                # an overrunning run is skipped rather than ending the schedule.
+                if not isinstance(f.exception(), base.ExecutionTimeoutError):
+                    f.result()
+                sf.future = self.schedule(
+                    delay, fn, *args, execution_timeout=execution_timeout, **kwargs
+                )
                 sf.future.add_done_callback(done_callback)
             except futures.CancelledError:
                 pass
@@ -114,7 +385,9 @@ class ProcessPoolExecutor:
                 sf.set_exception(e)
 
         sf = _ScheduledFuture()
-        sf.future = self.schedule(initial_delay, fn, *args, **kwargs)
+        sf.future = self.schedule(
+            initial_delay, fn, *args, execution_timeout=execution_timeout, **kwargs
+        )
         sf.future.add_done_callback(done_callback)
 
         return sf
@@ -137,3 +410,17 @@ class ProcessPoolExecutor:
         return self._thread_executor.queued_task_count + len(
             self._process_executor._pending_work_items  # pylint:disable=protected-access
         )
+
+    @property
+    def tracer(self) -> Optional[trace.Tracer]:
+        """The :class:`scheduledexecutor.trace.Tracer` recording tasks, if any."""
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Optional[trace.Tracer]) -> None:
+        self._tracer = tracer
+        self._thread_executor.tracer = tracer
+
+    @property
+    def overrun_count(self):
+        return self._overrun_count
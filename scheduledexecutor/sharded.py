@@ -0,0 +1,463 @@
+"""Provides :class:`ShardedProcessPoolExecutor`."""
+
+import ctypes
+import functools
+import heapq
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import process
+from multiprocessing import util
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from scheduledexecutor import base
+
+_FREE = 0
+_SCHEDULED = 1
+_CANCELLED = 2
+_RUNNING = 3
+
+
+class _Timer(ctypes.Structure):
+    """A row of the timer table shared by the parent and the shard processes."""
+
+    _fields_ = [
+        ("state", ctypes.c_int),
+        ("generation", ctypes.c_long),
+        ("trigger_time", ctypes.c_double),
+        ("period", ctypes.c_double),
+    ]
+
+
+def _dumps_exception(e: BaseException) -> bytes:
+    try:
+        return pickle.dumps(e)
+    except Exception:  # pylint:disable=broad-except
+        return pickle.dumps(RuntimeError(repr(e)))
+
+
+def _run(payload: bytes) -> Tuple[bool, bytes]:
+    try:
+        fn, args, kwargs = pickle.loads(payload)
+        return True, pickle.dumps(fn(*args, **kwargs))
+    except BaseException as e:  # pylint:disable=broad-except
+        return False, _dumps_exception(e)
+
+
+def _shard_main(
+    *,
+    shard,
+    table,
+    lock,
+    cmd_queue,
+    result_queue,
+    pool_sizes,
+    num_workers,
+    start_method,
+    initializer,
+    initargs,
+):
+    """Fires the due timers of a shard into its own pool of worker processes."""
+    mp_context = multiprocessing.get_context(start_method)
+    pool: Optional[process.ProcessPoolExecutor] = None
+    tasks: Dict[int, bytes] = {}
+    running: Set[int] = set()
+    heap: List = []
+    stopping = False
+
+    def finish(slot: int, kind: str, outcome: Optional[bytes] = None) -> None:
+        del tasks[slot]
+        result_queue.put((kind, slot, outcome))
+
+    def update_pool_size() -> None:
+        # pylint: disable=protected-access
+        processes = pool._processes if pool is not None else None
+        pool_sizes[shard] = sum(p.is_alive() for p in list((processes or {}).values()))
+
+    def done_callback(slot: int, pf: futures.Future) -> None:
+        update_pool_size()
+        try:
+            ok, outcome = pf.result()
+        except Exception as e:  # pylint:disable=broad-except
+            ok, outcome = False, _dumps_exception(e)
+        cmd_queue.put(("done", slot, ok, outcome))
+
+    def submit(slot: int) -> None:
+        nonlocal pool
+        while True:
+            if pool is None:
+                pool = process.ProcessPoolExecutor(
+                    num_workers, mp_context, initializer, initargs
+                )
+            try:
+                pf = pool.submit(_run, tasks[slot])
+                break
+            except process.BrokenProcessPool:
+                # A worker process died, which fails the runs in flight and may
+                # leave the queues of the pool unusable, like a lock held by an
+                # idle worker killed while reading. A new pool takes its place.
+                pool.shutdown(wait=False)
+                pool = None
+
+        update_pool_size()
+        pf.add_done_callback(functools.partial(done_callback, slot))
+
+    while True:
+        if stopping and not running:
+            if pool is not None:
+                pool.shutdown()
+            pool_sizes[shard] = 0
+            return
+
+        timeout = None
+        if heap and not stopping:
+            timeout = max(heap[0][0] - time.time(), 0.0)
+        try:
+            cmd = cmd_queue.get(timeout=timeout)
+        except queue.Empty:
+            cmd = ()
+
+        if cmd is None:
+            # lets the runs in flight complete, but fires no more timers.
+            stopping = True
+        elif cmd and cmd[0] == "add":
+            _, slot, payload = cmd
+            tasks[slot] = payload
+            heapq.heappush(heap, (table[slot].trigger_time, slot))
+        elif cmd and cmd[0] == "done":
+            _, slot, ok, outcome = cmd
+            if slot not in running:
+                continue
+            running.discard(slot)
+
+            timer = table[slot]
+            if not ok:
+                finish(slot, "exception", outcome)
+            elif timer.period == 0.0:
+                finish(slot, "result", outcome)
+            else:
+                with lock:
+                    if timer.state == _CANCELLED or stopping:
+                        finish(slot, "cancelled")
+                        continue
+
+                    if timer.period > 0.0:
+                        timer.trigger_time += timer.period
+                    else:
+                        timer.trigger_time = time.time() - timer.period
+                    heapq.heappush(heap, (timer.trigger_time, slot))
+
+        now = time.time()
+        while heap and not stopping and heap[0][0] <= now:
+            _, slot = heapq.heappop(heap)
+            timer = table[slot]
+            with lock:
+                cancelled = timer.state == _CANCELLED
+                if not cancelled and timer.period == 0.0:
+                    # from now on, the parent can no longer cancel it.
+                    timer.state = _RUNNING
+
+            if cancelled:
+                finish(slot, "cancelled")
+                continue
+
+            running.add(slot)
+            if timer.period == 0.0:
+                result_queue.put(("running", slot, None))
+            submit(slot)
+
+
+def _shutdown(cmd_queues, result_queue, processes, reader):
+    for cmd_queue in cmd_queues:
+        cmd_queue.put(None)
+    for p in list(processes):
+        p.join()
+    result_queue.put(None)
+    if reader is not threading.current_thread():
+        reader.join()
+
+
+class _ScheduledFuture(base.ScheduledFuture):
+    """:class:`ShardedProcessPoolExecutor`-specific :class:`scheduledexecutor.ScheduledFuture`."""
+
+    def __init__(
+        self, executor: "ShardedProcessPoolExecutor", slot: int, generation: int
+    ):
+        super().__init__()
+
+        self._executor: ShardedProcessPoolExecutor = executor
+        self._slot: int = slot
+        self._generation: int = generation
+
+    def cancel(self) -> bool:
+        with self._condition:
+            if self.cancelled():
+                return True
+
+            # pylint: disable=protected-access
+            if not self._executor._cancel(self._slot, self._generation):
+                return False
+            if not super().cancel():
+                return False
+
+            # nothing else would notify the waiters until the timer is due.
+            self.set_running_or_notify_cancel()
+            return True
+
+
+class ShardedProcessPoolExecutor:
+    """Schedules tasks on several scheduler processes, each with its own worker processes.
+
+    Unlike :class:`scheduledexecutor.ProcessPoolExecutor`, whose timers are all
+    fired by a single thread of the parent process, the timers are spread over
+    ``shards`` scheduler processes, so that dispatching scales with the number
+    of cores. The timers live in a table in shared memory, where each shard owns
+    ``capacity`` rows guarded by its own lock; the parent process writes new
+    timers and cancellations there, and the shards fire and re-arm them.
+
+    Each shard runs its tasks on a :class:`concurrent.futures.ProcessPoolExecutor`
+    of its own. When one of its worker processes dies, the runs in flight on that
+    shard fail with :class:`concurrent.futures.process.BrokenProcessPool`, and the
+    shard replaces its pool.
+
+    As with :class:`scheduledexecutor.ProcessPoolExecutor`, the tasks and their
+    arguments and results must be picklable.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context=None,
+        initializer: Optional[Callable] = None,
+        initargs=(),
+        *,
+        shards: Optional[int] = None,
+        capacity: int = 1024,
+    ):
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = cpu_count
+        if shards is None:
+            shards = min(max_workers, max(cpu_count // 2, 1))
+        if max_workers <= 0:
+            raise ValueError(f"max_workers must be > 0, not {max_workers}")
+        if not 0 < shards <= max_workers:
+            raise ValueError(f"shards must be in (0, max_workers], not {shards}")
+        if capacity <= 0:
+            raise ValueError(f"capacity must be > 0, not {capacity}")
+        if mp_context is None:
+            mp_context = multiprocessing.get_context()
+
+        self._max_workers: int = max_workers
+        self._capacity: int = capacity
+        self._table = mp_context.Array(_Timer, shards * capacity, lock=False)
+        self._locks = [mp_context.Lock() for _ in range(shards)]
+        self._cmd_queues = [mp_context.Queue() for _ in range(shards)]
+        self._result_queue = mp_context.Queue()
+        # the number of live worker processes of each shard.
+        self._pool_sizes = mp_context.Array(ctypes.c_int, shards, lock=False)
+
+        # Shards are not daemonic, since they start worker processes of their
+        # own; they are stopped at exit by the finalizer registered below.
+        self._processes: List[multiprocessing.process.BaseProcess] = [
+            mp_context.Process(
+                target=_shard_main,
+                kwargs={
+                    "shard": shard,
+                    "table": self._table,
+                    "lock": self._locks[shard],
+                    "cmd_queue": self._cmd_queues[shard],
+                    "result_queue": self._result_queue,
+                    "pool_sizes": self._pool_sizes,
+                    "num_workers": (
+                        max_workers // shards + (shard < max_workers % shards)
+                    ),
+                    "start_method": mp_context.get_start_method(),
+                    "initializer": initializer,
+                    "initargs": initargs,
+                },
+            )
+            for shard in range(shards)
+        ]
+
+        self._lock = threading.Lock()
+        self._free_slots: List[List[int]] = [
+            list(range((shard + 1) * capacity - 1, shard * capacity - 1, -1))
+            for shard in range(shards)
+        ]
+        self._next_shards = itertools.cycle(range(shards))
+        self._futures: Dict[int, _ScheduledFuture] = {}
+        self._shutdown: bool = False
+
+        for p in self._processes:
+            p.start()
+
+        self._reader = threading.Thread(
+            target=self._read_results,
+            name="ShardedProcessPoolExecutor_reader",
+            daemon=True,
+        )
+        self._reader.start()
+
+        # runs at exit before the queues are closed, which is at priority 10.
+        self._finalizer = util.Finalize(
+            self,
+            _shutdown,
+            args=(self._cmd_queues, self._result_queue, self._processes, self._reader),
+            exitpriority=20,
+        )
+
+    def _read_results(self) -> None:
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                return
+
+            kind, slot, outcome = message
+            future = self._futures[slot]
+            if kind == "running":
+                future.set_running_or_notify_cancel()
+                continue
+
+            if kind != "cancelled" and not future.cancelled():
+                try:
+                    value = pickle.loads(outcome)
+                except Exception as e:  # pylint:disable=broad-except
+                    kind, value = "exception", e
+
+                try:
+                    if kind == "result":
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                except Exception:  # pylint:disable=broad-except
+                    pass  # cancelled meanwhile.
+
+            # the future is resolved before its slot can be reused.
+            shard = slot // self._capacity
+            with self._lock:
+                del self._futures[slot]
+                with self._locks[shard]:
+                    self._table[slot].state = _FREE
+                self._free_slots[shard].append(slot)
+
+    def _cancel(self, slot: int, generation: int) -> bool:
+        """Cancels the timer, returning ``False`` if it is already running."""
+        shard = slot // self._capacity
+        with self._locks[shard]:
+            timer = self._table[slot]
+            if timer.generation != generation:
+                return True
+            if timer.state == _RUNNING:
+                return False
+            if timer.state == _SCHEDULED:
+                timer.state = _CANCELLED
+            return True
+
+    def _schedule(
+        self, initial_delay: float, period: float, fn: Callable, args, kwargs
+    ) -> base.ScheduledFuture:
+        if initial_delay < 0.0:
+            raise ValueError(f"initial_delay must be >= 0, not {initial_delay}")
+
+        payload = pickle.dumps((fn, args, kwargs))
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+
+            for _ in range(len(self._free_slots)):
+                shard = next(self._next_shards)
+                if self._free_slots[shard]:
+                    break
+            else:
+                raise RuntimeError("timer table is full")
+
+            slot = self._free_slots[shard].pop()
+            with self._locks[shard]:
+                timer = self._table[slot]
+                timer.state = _SCHEDULED
+                timer.generation += 1
+                timer.trigger_time = time.time() + initial_delay
+                timer.period = period
+
+            f = _ScheduledFuture(self, slot, timer.generation)
+            self._futures[slot] = f
+            self._cmd_queues[shard].put(("add", slot, payload))
+
+        return f
+
+    def schedule(
+        self, delay: float, fn: Callable, *args, **kwargs
+    ) -> base.ScheduledFuture:
+        return self._schedule(delay, 0.0, fn, args, kwargs)
+
+    def schedule_at_fixed_rate(
+        self, initial_delay: float, period: float, fn: Callable, *args, **kwargs
+    ) -> base.ScheduledFuture:
+        if period <= 0.0:
+            raise ValueError(f"period must be > 0, not {period}")
+
+        return self._schedule(initial_delay, period, fn, args, kwargs)
+
+    def schedule_at_fixed_delay(
+        self, initial_delay: float, delay: float, fn: Callable, *args, **kwargs
+    ) -> base.ScheduledFuture:
+        if delay <= 0.0:
+            raise ValueError(f"delay must be > 0, not {delay}")
+
+        return self._schedule(initial_delay, -delay, fn, args, kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> futures.Future:
+        return self.schedule(0.0, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            pending = list(self._futures.values())
+
+        for f in pending:
+            f.cancel()
+
+        if wait:
+            self._finalizer()
+        else:
+            threading.Thread(target=self._finalizer, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
+
+    @property
+    def shard_count(self):
+        return len(self._locks)
+
+    @property
+    def pool_size(self):
+        return sum(self._pool_sizes)
+
+    @property
+    def max_pool_size(self):
+        return self._max_workers
+
+    @property
+    def queued_task_count(self):
+        count = 0
+        for shard, lock in enumerate(self._locks):
+            start = shard * self._capacity
+            with lock:
+                count += sum(
+                    self._table[slot].state == _SCHEDULED
+                    for slot in range(start, start + self._capacity)
+                )
+        return count
@@ -0,0 +1,238 @@
+"""Provides :class:`ScheduleStore`."""
+
+import importlib
+import logging
+import math
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent import futures
+from typing import Any, Callable, Dict, List, Tuple
+
+from scheduledexecutor import base, thread
+
+_logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    key TEXT PRIMARY KEY,
+    fn TEXT NOT NULL,
+    args BLOB NOT NULL,
+    kwargs BLOB NOT NULL,
+    period REAL NOT NULL,
+    trigger_time REAL NOT NULL
+)
+"""
+
+
+def _name_of(fn: Callable) -> str:
+    name = f"{getattr(fn, '__module__', None)}:{getattr(fn, '__qualname__', None)}"
+    try:
+        resolved = _resolve(name)
+    except (ImportError, AttributeError):
+        resolved = None
+    if resolved is not fn:
+        raise ValueError(f"fn must be an importable module-level callable, not {fn!r}")
+    return name
+
+
+def _resolve(name: str) -> Callable:
+    module_name, _, qualname = name.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _next_trigger_time(trigger_time: float, period: float, now: float) -> float:
+    if trigger_time >= now:
+        return trigger_time
+    if period > 0.0:
+        # keeps the phase of a fixed-rate schedule, skipping the missed runs.
+        return trigger_time + math.ceil((now - trigger_time) / period) * period
+    return now
+
+
+class ScheduleStore:
+    """Persists the schedules of a :class:`scheduledexecutor.ThreadPoolExecutor` in SQLite.
+
+    Only module-level callables, which can be imported again by name, and
+    picklable arguments can be stored. :meth:`restore` loads every stored
+    schedule into the executor at once; fixed-rate schedules keep their phase,
+    while overdue fixed-delay and one-shot ones run right away. Call
+    :meth:`checkpoint` to record the latest trigger times of fixed-delay
+    schedules.
+    """
+
+    # pylint: disable=protected-access
+
+    def __init__(self, executor: thread.ThreadPoolExecutor, path: str):
+        self._executor: thread.ThreadPoolExecutor = executor
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        self._work_items: Dict[str, thread._ScheduledWorkItem] = {}
+
+    def _track(self, key: str, w: thread._ScheduledWorkItem) -> base.ScheduledFuture:
+        # w has been registered in _work_items under the lock already.
+        def done_callback(f: futures.Future):
+            if self._work_items.get(key) is not w:
+                return
+            del self._work_items[key]
+            # a periodic schedule is only done once cancelled or failed.
+            if not f.cancelled():
+                self._delete(key)
+
+        w.future.add_done_callback(done_callback)
+        return w.future
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM schedules WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _add(
+        self,
+        key: str,
+        initial_delay: float,
+        fn: Callable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        *,
+        period: float,
+    ) -> base.ScheduledFuture:
+        if initial_delay < 0.0:
+            raise ValueError(f"initial_delay must be >= 0, not {initial_delay}")
+
+        trigger_time = time.time() + initial_delay
+        row = (key, _name_of(fn), pickle.dumps(args), pickle.dumps(kwargs), period)
+        # the key is checked and taken, and the row written once scheduled, under
+        # the lock so that a run completing in the meantime cannot delete the row
+        # before it is written.
+        with self._lock:
+            if key in self._work_items:
+                raise ValueError(f"key already scheduled: {key}")
+
+            (w,) = self._executor._schedule_all(
+                [(trigger_time, period, fn, args, kwargs)]
+            )
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO schedules VALUES (?, ?, ?, ?, ?, ?)",
+                    row + (trigger_time,),
+                )
+                self._conn.commit()
+            except Exception:
+                w.future.cancel()
+                raise
+            self._work_items[key] = w
+
+        return self._track(key, w)
+
+    def schedule(
+        self, key: str, delay: float, fn: Callable, *args, **kwargs
+    ) -> base.ScheduledFuture:
+        return self._add(key, delay, fn, args, kwargs, period=0.0)
+
+    def schedule_at_fixed_rate(
+        self,
+        key: str,
+        initial_delay: float,
+        period: float,
+        fn: Callable,
+        *args,
+        **kwargs,
+    ) -> base.ScheduledFuture:
+        if period <= 0.0:
+            raise ValueError(f"period must be > 0, not {period}")
+
+        return self._add(key, initial_delay, fn, args, kwargs, period=period)
+
+    def schedule_at_fixed_delay(
+        self,
+        key: str,
+        initial_delay: float,
+        delay: float,
+        fn: Callable,
+        *args,
+        **kwargs,
+    ) -> base.ScheduledFuture:
+        if delay <= 0.0:
+            raise ValueError(f"delay must be > 0, not {delay}")
+
+        return self._add(key, initial_delay, fn, args, kwargs, period=-delay)
+
+    def remove(self, key: str) -> bool:
+        """Cancels the schedule and removes it from the store."""
+        w = self._work_items.pop(key, None)
+        self._delete(key)
+        return w is not None and w.future.cancel()
+
+    def restore(self) -> Dict[str, base.ScheduledFuture]:
+        """Schedules every stored schedule, returning their futures by key.
+
+        Schedules whose callable cannot be imported or whose arguments cannot be
+        unpickled anymore are skipped and logged, and are kept in the store.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, fn, args, kwargs, period, trigger_time FROM schedules"
+            ).fetchall()
+
+        now = time.time()
+        fns: Dict[str, Callable] = {}
+        keys: List[str] = []
+        entries = []
+        for key, name, args, kwargs, period, trigger_time in rows:
+            if key in self._work_items:
+                continue
+            try:
+                fn = fns.get(name)
+                if fn is None:
+                    fn = fns[name] = _resolve(name)
+                args, kwargs = pickle.loads(args), pickle.loads(kwargs)
+            except Exception:  # pylint:disable=broad-except
+                _logger.exception("cannot restore schedule %r of %s", key, name)
+                continue
+
+            keys.append(key)
+            entries.append(
+                (
+                    _next_trigger_time(trigger_time, period, now),
+                    period,
+                    fn,
+                    args,
+                    kwargs,
+                )
+            )
+
+        with self._lock:
+            # keys may have been scheduled since they were filtered above.
+            pending = [
+                (key, entry)
+                for key, entry in zip(keys, entries)
+                if key not in self._work_items
+            ]
+            work_items = self._executor._schedule_all([e for _, e in pending])
+            for (key, _), w in zip(pending, work_items):
+                self._work_items[key] = w
+
+        return {key: self._track(key, w) for (key, _), w in zip(pending, work_items)}
+
+    def checkpoint(self) -> None:
+        """Records the next trigger times of the schedules in the store."""
+        rows = [(w.trigger_time, key) for key, w in list(self._work_items.items())]
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE schedules SET trigger_time = ? WHERE key = ?", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
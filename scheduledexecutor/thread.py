@@ -5,18 +5,27 @@ from __future__ import annotations
 import contextlib
 import queue
 import sys
+import threading
 import time
 from concurrent import futures
 from concurrent.futures import _base, thread
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Tuple
 
-from scheduledexecutor import base
+from scheduledexecutor import base, trace
 
 
 def _trigger_time(delay: float) -> float:
     return time.time() + delay
 
 
+# the id of the work item run by the current worker thread, while tracing.
+_running = threading.local()
+
+
+def _current_task_id() -> Optional[int]:
+    return getattr(_running, "task_id", None)
+
+
 class _ScheduledFuture(base.ScheduledFuture):
     """:class:`ThreadPoolExecutor`-specific :class:`scheduledexecutor.base.ScheduledFuture`."""
 
@@ -45,12 +54,14 @@ class _ScheduledWorkItem(thread._WorkItem):  # pylint: disable=protected-access
         executor: ThreadPoolExecutor,
         trigger_time: float,
         period: float,
+        timeout: Optional[float] = None,
     ):
         super().__init__(future, fn, args, kwargs)
 
         self.executor: ThreadPoolExecutor = executor
         self.trigger_time: float = trigger_time
         self.period: float = period
+        self.timeout: Optional[float] = timeout
 
     def delay(self) -> float:
         return self.trigger_time - time.time()
@@ -65,24 +76,98 @@ class _ScheduledWorkItem(thread._WorkItem):  # pylint: disable=protected-access
         else:
             self.trigger_time = _trigger_time(-p)
 
+    def _watch(self) -> Optional[base.WatchdogEntry]:
+        if self.timeout is None:
+            return None
+
+        # pylint: disable=protected-access
+        return self.executor._watchdog.watch(self.timeout, self._on_overrun)
+
+    def set_next_run_time_after_overrun(self) -> None:
+        p = self.period
+        if p < 0:
+            self.trigger_time = _trigger_time(-p)
+            return
+
+        # the ticks that fell due while the run hung are skipped and counted.
+        skipped = int((time.time() - self.trigger_time) // p)
+        self.executor._overrun_count += skipped  # pylint: disable=protected-access
+        self.trigger_time += (skipped + 1) * p
+
+    def _on_overrun(self) -> None:
+        # A thread cannot be interrupted, so the run is abandoned instead: its
+        # outcome will be discarded whenever it eventually returns. A periodic
+        # task is only run again then, so that it never holds more than one
+        # thread.
+        self.executor._overrun_count += 1  # pylint: disable=protected-access
+
+        if not self.is_periodic():
+            self.future.set_exception(
+                base.ExecutionTimeoutError(
+                    f"task did not complete within {self.timeout} seconds"
+                )
+            )
+
     def run(self) -> None:
+        tracer = self.executor.tracer
+        if tracer is None:
+            self._run()
+            return
+
+        task_id, fn, start = id(self), self.fn, time.time()
+        _running.task_id = task_id
+        try:
+            self._run()
+        finally:
+            _running.task_id = None
+            tracer.record(trace.RUN, task_id, fn, start, time.time())
+
+    def _run(self) -> None:
         if not self.is_periodic():
-            super().run()
+            if self.timeout is None:
+                super().run()
+                return
+
+            if not self.future.set_running_or_notify_cancel():
+                return
+
+            entry = self._watch()
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except BaseException as exc:  # pylint:disable=broad-except
+                if entry.disarm():
+                    self.future.set_exception(exc)
+                self = None  # pylint:disable=self-cls-assignment
+            else:
+                if entry.disarm():
+                    self.future.set_result(result)
             return
 
         if self.future.notify_cancel_if_cancelled():
             return
 
+        entry = self._watch()
         try:
             self.fn(*self.args, **self.kwargs)
         except Exception as e:  # pylint:disable=broad-except
-            self.future.set_exception(e)
-            self = None  # pylint:disable=self-cls-assignment
+            if entry is None or entry.disarm():
+                self.future.set_exception(e)
+                self = None  # pylint:disable=self-cls-assignment
+                return
         else:
-            self.set_next_run_time()
+            if entry is None or entry.disarm():
+                self.set_next_run_time()
 
-            # pylint: disable=protected-access
-            self.executor._re_execute_periodic(self)
+                # pylint: disable=protected-access
+                self.executor._re_execute_periodic(self)
+                return
+
+        # the run has overrun: its outcome is discarded, and the task is
+        # scheduled again now that it no longer holds the thread.
+        self.set_next_run_time_after_overrun()
+
+        # pylint: disable=protected-access
+        self.executor._re_execute_periodic(self)
 
 
 class ThreadPoolExecutor(futures.ThreadPoolExecutor):
@@ -101,6 +186,11 @@ class ThreadPoolExecutor(futures.ThreadPoolExecutor):
 
         self.task_decorator: Optional[Callable[[Callable], Callable]] = None
 
+        self._watchdog: base.Watchdog = base.Watchdog(
+            (self._thread_name_prefix or "ThreadPoolExecutor") + "_watchdog"
+        )
+        self._overrun_count: int = 0
+
     def _delayed_execute(self, work_item: _ScheduledWorkItem) -> None:
         self._work_queue.put(work_item)
         self._adjust_thread_count()
@@ -109,12 +199,51 @@ class ThreadPoolExecutor(futures.ThreadPoolExecutor):
         self._work_queue.put(work_item)
         self._adjust_thread_count()
 
-    def _schedule(
-        self, initial_delay: float, period: float, fn: Callable, *args, **kwargs
-    ) -> _ScheduledFuture:
-        if initial_delay < 0.0:
-            raise ValueError(f"initial_delay must be >= 0, not {initial_delay}")
-
+    def _delayed_execute_when_done(
+        self,
+        work_item: _ScheduledWorkItem,
+        delay: float,
+        fs: Collection[futures.Future],
+    ) -> None:
+        # Waits on done callbacks rather than on a worker thread; the last
+        # upstream to complete puts the work item into the work queue.
+        remaining = len(fs)
+        lock = threading.Lock()
+
+        def done_callback(upstream: futures.Future):
+            nonlocal remaining
+            with lock:
+                if remaining == 0:
+                    return
+
+                failed = upstream.cancelled() or upstream.exception() is not None
+                remaining = 0 if failed else remaining - 1
+                if remaining:
+                    return
+
+            f = work_item.future
+            if failed:
+                if upstream.cancelled():
+                    f.cancel()
+                    f.notify_cancel_if_cancelled()
+                elif f.set_running_or_notify_cancel():
+                    f.set_exception(upstream.exception())
+                return
+
+            with self._shutdown_lock:
+                if self._shutdown:
+                    f.cancel()
+                    f.notify_cancel_if_cancelled()
+                    return
+
+                work_item.trigger_time = _trigger_time(delay)
+                self._delayed_execute(work_item)
+
+        for upstream in fs:
+            upstream.add_done_callback(done_callback)
+
+    @contextlib.contextmanager
+    def _schedule_lock(self):
         if sys.version_info >= (3, 9):
             # pylint: disable=protected-access
             ctx_managers = [self._shutdown_lock, thread._global_shutdown_lock]
@@ -135,46 +264,199 @@ class ThreadPoolExecutor(futures.ThreadPoolExecutor):
                     "cannot schedule new futures after interpreter shutdown"
                 )
 
-            f = _ScheduledFuture()
-            w = _ScheduledWorkItem(
-                f,
-                fn
-                if self.task_decorator is None
-                else self.task_decorator(fn),  # pylint:disable=not-callable
+            yield
+
+    def _new_work_item(
+        self,
+        trigger_time: float,
+        period: float,
+        fn: Callable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        *,
+        execution_timeout: Optional[float] = None,
+    ) -> _ScheduledWorkItem:
+        return _ScheduledWorkItem(
+            _ScheduledFuture(),
+            (
+                fn if self.task_decorator is None else self.task_decorator(fn)
+            ),  # pylint:disable=not-callable
+            args,
+            kwargs,
+            executor=self,
+            trigger_time=trigger_time,
+            period=period,
+            timeout=execution_timeout,
+        )
+
+    def _schedule(
+        self,
+        initial_delay: float,
+        period: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        depends_on: Collection[futures.Future] = (),
+        **kwargs,
+    ) -> _ScheduledFuture:
+        if initial_delay < 0.0:
+            raise ValueError(f"initial_delay must be >= 0, not {initial_delay}")
+        if execution_timeout is not None and execution_timeout <= 0.0:
+            raise ValueError(f"execution_timeout must be > 0, not {execution_timeout}")
+
+        with self._schedule_lock():
+            w = self._new_work_item(
+                _trigger_time(initial_delay),
+                period,
+                fn,
                 args,
                 kwargs,
-                executor=self,
-                trigger_time=_trigger_time(initial_delay),
-                period=period,
+                execution_timeout=execution_timeout,
             )
 
-            self._delayed_execute(w)
-            return f
+            if not depends_on:
+                self._delayed_execute(w)
+                return w.future
+
+        # done callbacks of completed futures are called right away, so they must
+        # be added without holding the shutdown lock.
+        self._delayed_execute_when_done(w, initial_delay, depends_on)
+        return w.future
+
+    def _schedule_all(
+        self,
+        entries: Iterable[
+            Tuple[float, float, Callable, Tuple[Any, ...], Dict[str, Any]]
+        ],
+    ) -> List[_ScheduledWorkItem]:
+        """Schedules ``(trigger_time, period, fn, args, kwargs)`` entries at once.
+
+        The work items are heapified into the work queue in a single step, which
+        is much faster than scheduling them one by one.
+        """
+        with self._schedule_lock():
+            work_items = [
+                self._new_work_item(trigger_time, period, fn, args, kwargs)
+                for trigger_time, period, fn, args, kwargs in entries
+            ]
+
+            self._work_queue.put_all(work_items)
+            for _ in range(min(len(work_items), self._max_workers)):
+                self._adjust_thread_count()
+
+        return work_items
 
     def schedule(
-        self, delay: float, fn: Callable, *args, **kwargs
+        self,
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> base.ScheduledFuture:
+        """Runs ``fn`` once after ``delay`` seconds.
+
+        If the run exceeds ``execution_timeout`` seconds, the returned future
+        fails with :class:`scheduledexecutor.base.ExecutionTimeoutError`.
+        """
+        return self._schedule(
+            delay, 0.0, fn, *args, execution_timeout=execution_timeout, **kwargs
+        )
+
+    def schedule_after(
+        self,
+        fs: Collection[futures.Future],
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
-        return self._schedule(delay, 0.0, fn, *args, **kwargs)
+        """Runs ``fn`` once, ``delay`` seconds after all the futures in ``fs`` complete.
+
+        If any of them fails or is cancelled, the returned future fails or is
+        cancelled likewise without running ``fn``. The returned future may itself
+        be given to another :meth:`schedule_after` to build a graph of tasks.
+        """
+        return self._schedule(
+            delay,
+            0.0,
+            fn,
+            *args,
+            execution_timeout=execution_timeout,
+            depends_on=set(fs),
+            **kwargs,
+        )
 
     def schedule_at_fixed_rate(
-        self, initial_delay: float, period: float, fn: Callable, *args, **kwargs
+        self,
+        initial_delay: float,
+        period: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
+        """Runs ``fn`` every ``period`` seconds after ``initial_delay`` seconds.
+
+        A run exceeding ``execution_timeout`` seconds is skipped and counted in
+        :attr:`overrun_count`. The next run is scheduled once it returns, and the
+        runs falling due until then are skipped and counted likewise.
+        """
         if period <= 0.0:
             raise ValueError(f"period must be > 0, not {period}")
 
-        return self._schedule(initial_delay, period, fn, *args, **kwargs)
+        return self._schedule(
+            initial_delay,
+            period,
+            fn,
+            *args,
+            execution_timeout=execution_timeout,
+            **kwargs,
+        )
 
     def schedule_at_fixed_delay(
-        self, initial_delay: float, delay: float, fn: Callable, *args, **kwargs
+        self,
+        initial_delay: float,
+        delay: float,
+        fn: Callable,
+        *args,
+        execution_timeout: Optional[float] = None,
+        **kwargs,
     ) -> base.ScheduledFuture:
+        """Runs ``fn`` repeatedly, ``delay`` seconds after each run completes.
+
+        A run exceeding ``execution_timeout`` seconds is skipped and counted in
+        :attr:`overrun_count`, and the next run is scheduled once it returns.
+        """
         if delay <= 0.0:
             raise ValueError(f"delay must be > 0, not {delay}")
 
-        return self._schedule(initial_delay, -delay, fn, *args, **kwargs)
+        return self._schedule(
+            initial_delay,
+            -delay,
+            fn,
+            *args,
+            execution_timeout=execution_timeout,
+            **kwargs,
+        )
 
     def submit(self, fn: Callable, *args, **kwargs) -> base.ScheduledFuture:
         return self.schedule(0.0, fn, *args, **kwargs)
 
+    @property
+    def tracer(self) -> Optional[trace.Tracer]:
+        """The :class:`scheduledexecutor.trace.Tracer` recording tasks, if any."""
+        return self._work_queue.tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Optional[trace.Tracer]) -> None:
+        self._work_queue.tracer = tracer
+
+    def shutdown(self, wait=True, **kwargs):
+        super().shutdown(wait, **kwargs)
+        self._watchdog.shutdown()
+
     @property
     def pool_size(self):
         return len(self._threads)
@@ -187,3 +469,7 @@ class ThreadPoolExecutor(futures.ThreadPoolExecutor):
     def queued_task_count(self):
         # pylint:disable=protected-access
         return self._work_queue._qsize()
+
+    @property
+    def overrun_count(self):
+        return self._overrun_count
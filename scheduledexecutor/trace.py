@@ -0,0 +1,111 @@
+"""Provides :class:`Tracer`."""
+
+import collections
+import json
+import os
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional
+
+ENQUEUE = "enqueue"
+DUE = "due"
+DEQUEUE = "dequeue"
+RUN = "run"
+DISPATCH = "dispatch"
+PROCESS = "process"
+
+
+def _name_of(fn: Any) -> str:
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+class Tracer:
+    """Records scheduler activity into a ring buffer of the last ``capacity`` events.
+
+    Set it to the ``tracer`` of an executor to enable tracing, and use
+    :meth:`dump` to write the events in the Chrome trace event format, which
+    can be loaded into Perfetto or ``chrome://tracing``.
+
+    For each run of a task, the following events are recorded: ``enqueue`` when
+    it is put into the :class:`scheduledexecutor.base.DelayQueue`, ``due`` at its
+    trigger time, ``dequeue`` when a worker takes it, and ``run`` spanning its
+    execution. Tasks of :class:`scheduledexecutor.ProcessPoolExecutor`
+    additionally span ``process`` from their dispatch to the worker processes
+    until their completion.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be > 0, not {capacity}")
+
+        self._events: collections.deque = collections.deque(maxlen=capacity)
+
+    def record(
+        self,
+        event: str,
+        task_id: int,
+        fn: Any,
+        ts: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> None:
+        """Records an event of a task, spanning from ``ts`` to ``end`` if given."""
+        self._events.append(
+            (
+                event,
+                time.time() if ts is None else ts,
+                end,
+                task_id,
+                _name_of(fn),
+                threading.get_ident(),
+            )
+        )
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Returns the recorded events in the Chrome trace event format."""
+        pid = os.getpid()
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+        tids = set()
+        trace_events = []
+
+        for event, ts, end, task_id, name, tid in list(self._events):
+            e = {
+                "name": name if event in (RUN, PROCESS) else event,
+                "cat": event,
+                "ts": ts * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {"task_id": task_id, "fn": name},
+            }
+            if event == PROCESS:
+                # asynchronous, since the spans of a thread must nest.
+                e.update(ph="b", id=task_id)
+                trace_events.append(e)
+                trace_events.append(dict(e, ph="e", ts=end * 1e6))
+            elif end is not None:
+                e.update(ph="X", dur=(end - ts) * 1e6)
+                trace_events.append(e)
+            else:
+                e.update(ph="i", s="t")
+                trace_events.append(e)
+            tids.add(tid)
+
+        for tid in tids:
+            if tid in thread_names:
+                trace_events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": thread_names[tid]},
+                    }
+                )
+
+        return trace_events
+
+    def dump(self, fp: IO[str]) -> None:
+        """Writes the recorded events to ``fp`` as a Chrome trace JSON object."""
+        json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, fp)
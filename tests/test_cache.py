@@ -0,0 +1,90 @@
+"""Tests RefreshingValue."""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+import scheduledexecutor as executors
+
+
+def test_get():
+    counter = itertools.count()
+    executor = executors.ThreadPoolExecutor()
+    value = executors.RefreshingValue(executor, lambda: next(counter), period=1.0)
+    assert value.get() == 0
+    time.sleep(1.2)
+    assert value.get() == 1
+    assert value.age < 1.0
+    assert value.cancel() is True
+
+
+def test_get_should_keep_value_when_refresh_failed():
+    calls = itertools.count()
+
+    def fn():
+        if next(calls) > 0:
+            raise ValueError("boom")
+        return "good"
+
+    executor = executors.ThreadPoolExecutor()
+    value = executors.RefreshingValue(executor, fn, delay=0.2)
+    assert value.get() == "good"
+    time.sleep(0.5)
+    assert value.get() == "good"
+    assert isinstance(value.last_error, ValueError)
+    value.cancel()
+
+
+def test_refresh_should_deduplicate_concurrent_refreshes():
+    calls = itertools.count()
+    gate = threading.Event()
+
+    def fn():
+        n = next(calls)
+        if n > 0:
+            gate.wait()
+        return n
+
+    executor = executors.ThreadPoolExecutor(4)
+    value = executors.RefreshingValue(executor, fn, period=60.0)
+    assert value.get() == 0
+    fs = [value.refresh() for _ in range(10)]
+    assert all(f is fs[0] for f in fs)
+    gate.set()
+    assert fs[0].result() == 1
+    assert value.get() == 1
+    value.cancel()
+
+
+def test_get_should_refresh_when_stale():
+    counter = itertools.count()
+    executor = executors.ThreadPoolExecutor()
+    value = executors.RefreshingValue(
+        executor, lambda: next(counter), period=60.0, max_age=0.2
+    )
+    assert value.get() == 0
+    time.sleep(0.3)
+    assert value.get() == 0  # stale value is served while refreshing
+    time.sleep(0.1)
+    assert value.get() == 1
+    value.cancel()
+
+
+def test_init_should_raise_when_both_period_and_delay():
+    executor = executors.ThreadPoolExecutor()
+    with pytest.raises(ValueError):
+        executors.RefreshingValue(executor, lambda: None, period=1.0, delay=1.0)
+
+
+def test_get_should_serve_stale_value_when_refresh_cannot_be_submitted():
+    executor = executors.ThreadPoolExecutor()
+    value = executors.RefreshingValue(
+        executor, lambda: "good", period=60.0, max_age=0.1
+    )
+    assert value.get() == "good"
+    executor.shutdown(wait=False)
+    time.sleep(0.2)
+    assert value.get() == "good"
+    assert isinstance(value.last_error, RuntimeError)
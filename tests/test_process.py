@@ -4,6 +4,8 @@ import os
 import random
 import threading
 import time
+from concurrent import futures
+from concurrent.futures import process
 
 import pytest
 
@@ -124,3 +126,112 @@ def test_schedule_at_fixed_delay_should_raise_when_negative_delay():
             pid=os.getpid(),
             tid=threading.get_ident(),
         )
+
+
+def test_schedule_should_raise_when_execution_timeout_exceeded():
+    x = random.random()
+    executor = executors.ProcessPoolExecutor(2)
+    f = executor.schedule(
+        0.0,
+        testing.echo,
+        x,
+        execution_timeout=0.2,
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    with pytest.raises(executors.ExecutionTimeoutError):
+        f.result()
+    assert executor.overrun_count == 1
+
+    f = executor.submit(
+        testing.echo,
+        x,
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    assert f.result() == x
+
+
+def test_schedule_at_fixed_delay_should_skip_overrunning_run():
+    counter = testing.Counter()
+    executor = executors.ProcessPoolExecutor(2)
+    f = executor.schedule_at_fixed_delay(
+        0.0,
+        0.2,
+        testing.hang_once,
+        counter,
+        60.0,
+        execution_timeout=1.0,
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    time.sleep(4.0)
+    assert f.cancel() is True
+    assert executor.overrun_count == 1
+    assert counter.value() >= 3
+
+
+def test_schedule_after():
+    x = random.random()
+    executor = executors.ProcessPoolExecutor(2)
+    kwargs = {
+        "mode": testing.TestMode.PROCESS,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    upstream1 = executor.submit(testing.echo, x, **kwargs)
+    upstream2 = executor.schedule(1.0, testing.echo, x, **kwargs)
+    t = time.time()
+    f = executor.schedule_after([upstream1, upstream2], 0.5, testing.echo, x, **kwargs)
+    g = executor.schedule_after([f], 0.0, testing.echo, x, **kwargs)
+    assert g.result() == x
+    assert time.time() >= t + 2.5
+    assert upstream2.done() and f.done()
+
+
+def test_schedule_after_should_be_cancelled_when_upstream_cancelled():
+    executor = executors.ProcessPoolExecutor()
+    upstream = executor.schedule(
+        10.0,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    f = executor.schedule_after(
+        [upstream],
+        0.0,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    assert upstream.cancel() is True
+    assert f.cancelled()
+    done, _ = futures.wait([f], timeout=1.0)
+    assert done == {f}
+
+
+def test_schedule_should_not_rerun_tasks_interrupted_by_overrun():
+    x = random.random()
+    executor = executors.ProcessPoolExecutor(2)
+    kwargs = {
+        "mode": testing.TestMode.PROCESS,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    overrunning = executor.schedule(
+        0.0, testing.echo, x, execution_timeout=0.2, **kwargs
+    )
+    interrupted = executor.submit(testing.echo, x, **kwargs)
+    not_started = executor.submit(testing.echo, x, **kwargs)
+    with pytest.raises(executors.ExecutionTimeoutError):
+        overrunning.result()
+    with pytest.raises(process.BrokenProcessPool):
+        interrupted.result()
+    assert not_started.result() == x
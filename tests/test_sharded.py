@@ -0,0 +1,162 @@
+"""Tests ShardedProcessPoolExecutor."""
+
+import os
+import random
+import signal
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import process
+
+import pytest
+
+import scheduledexecutor as executors
+from tests import testing
+
+
+def test_submit():
+    x = random.random()
+    with executors.ShardedProcessPoolExecutor(4, shards=2) as executor:
+        assert executor.shard_count == 2
+        assert executor.pool_size == 0
+        assert executor.max_pool_size == 4
+        assert executor.queued_task_count == 0
+        fs = [
+            executor.submit(
+                testing.echo,
+                x + i,
+                mode=testing.TestMode.PROCESS,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+            )
+            for i in range(4)
+        ]
+        assert [f.result() for f in fs] == [x + i for i in range(4)]
+        assert 0 < executor.pool_size <= 4
+        assert executor.queued_task_count == 0
+
+
+def test_submit_should_raise_when_task_raised():
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        f = executor.submit(
+            testing.echo, 0.0, mode=testing.TestMode.THREAD, pid=os.getpid(), tid=0
+        )
+        with pytest.raises(AssertionError):
+            f.result()
+
+        f = executor.submit(testing.raise_unpicklable)
+        with pytest.raises(RuntimeError):
+            f.result()
+
+
+def test_submit_should_raise_when_worker_died():
+    x = random.random()
+    with executors.ShardedProcessPoolExecutor(1) as executor:
+        f = executor.submit(os._exit, 1)  # pylint:disable=protected-access
+        with pytest.raises(process.BrokenProcessPool):
+            f.result(timeout=10.0)
+
+        f = executor.submit(
+            testing.echo,
+            x,
+            mode=testing.TestMode.PROCESS,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        assert f.result(timeout=10.0) == x
+
+
+def test_submit_should_run_when_idle_worker_killed():
+    x = random.random()
+    with executors.ShardedProcessPoolExecutor(1) as executor:
+        pid = executor.submit(os.getpid).result(timeout=10.0)
+        os.kill(pid, signal.SIGKILL)
+        time.sleep(0.5)
+
+        f = executor.submit(
+            testing.echo,
+            x,
+            mode=testing.TestMode.PROCESS,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        assert f.result(timeout=10.0) == x
+
+
+def test_cancel():
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        f = executor.schedule(60.0, time.sleep, 0.0)
+        assert f.cancel() is True
+        done, _ = futures.wait([f], timeout=1.0)
+        assert done == {f}
+
+        f = executor.submit(time.sleep, 1.0)
+        while not f.running():
+            time.sleep(0.05)
+        assert f.cancel() is False
+        assert f.result() is None
+
+
+def test_schedule():
+    x = random.random()
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        t = time.time()
+        f = executor.schedule(
+            1.0,
+            testing.echo,
+            x,
+            mode=testing.TestMode.PROCESS,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        assert executor.queued_task_count == 1
+        assert f.result() == x
+        assert time.time() >= t + 1.0
+
+
+def test_schedule_should_raise_when_table_full():
+    with executors.ShardedProcessPoolExecutor(2, shards=2, capacity=1) as executor:
+        for _ in range(2):
+            executor.schedule(60.0, time.sleep, 0.0)
+        with pytest.raises(RuntimeError):
+            executor.schedule(60.0, time.sleep, 0.0)
+
+
+def test_schedule_at_fixed_rate():
+    counter = testing.Counter()
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        f = executor.schedule_at_fixed_rate(
+            1.0,
+            1.0,
+            testing.inc,
+            counter,
+            mode=testing.TestMode.PROCESS,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        time.sleep(5.2)
+        assert f.cancel() is True
+        assert counter.value() == 4
+
+
+def test_schedule_at_fixed_delay():
+    counter = testing.Counter()
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        f = executor.schedule_at_fixed_delay(
+            1.0,
+            1.0,
+            testing.inc,
+            counter,
+            mode=testing.TestMode.PROCESS,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        time.sleep(5.2)
+        assert f.cancel() is True
+        assert counter.value() == 3
+
+
+def test_schedule_at_fixed_delay_should_raise_when_negative_delay():
+    with executors.ShardedProcessPoolExecutor(2) as executor:
+        with pytest.raises(ValueError):
+            executor.schedule_at_fixed_delay(1.0, -1.0, time.sleep, 0.0)
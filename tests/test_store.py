@@ -0,0 +1,141 @@
+"""Tests ScheduleStore."""
+
+import os
+import threading
+import time
+
+import pytest
+
+import scheduledexecutor as executors
+from tests import testing
+
+
+def test_restore(tmp_path):
+    # pylint:disable=protected-access
+    path = str(tmp_path / "schedules.db")
+    counter = testing.Counter()
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, path)
+    f = store.schedule_at_fixed_rate(
+        "inc",
+        0.5,
+        1.0,
+        testing.inc,
+        counter,
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    trigger_time = store._work_items["inc"].trigger_time
+    time.sleep(2.2)
+    assert f.cancel() is True
+    store.close()
+    assert counter.value() == 2
+
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, path)
+    fs = store.restore()
+    assert list(fs) == ["inc"]
+    restored_time = store._work_items["inc"].trigger_time
+    assert restored_time > time.time()
+    assert (restored_time - trigger_time) % 1.0 == pytest.approx(0.0, abs=1e-6)
+    time.sleep(restored_time - time.time() + 0.7)
+    assert store.remove("inc") is True
+    assert counter.value() == 3
+    assert store.restore() == {}
+
+
+def test_schedule_should_delete_when_done(tmp_path):
+    path = str(tmp_path / "schedules.db")
+    counter = testing.Counter()
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, path)
+    f = store.schedule(
+        "inc",
+        0.0,
+        testing.inc,
+        counter,
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    f.result()
+    assert counter.value() == 1
+    assert store.restore() == {}
+
+
+def test_schedule_should_raise_when_fn_not_importable(tmp_path):
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, str(tmp_path / "schedules.db"))
+    with pytest.raises(ValueError):
+        store.schedule("lambda", 0.0, lambda: None)
+
+
+def test_schedule_should_delete_when_periodic_fn_raised(tmp_path):
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, str(tmp_path / "schedules.db"))
+    f = store.schedule_at_fixed_rate("raise", 0.0, 1.0, testing.raise_unpicklable)
+    assert isinstance(f.exception(), testing.UnpicklableError)
+    assert store.restore() == {}
+
+
+def test_restore_should_skip_unrestorable_schedules(tmp_path, caplog):
+    # pylint:disable=protected-access
+    path = str(tmp_path / "schedules.db")
+    counter = testing.Counter()
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, path)
+    fs = [
+        store.schedule(
+            key,
+            10.0,
+            testing.inc,
+            counter,
+            mode=testing.TestMode.THREAD,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        for key in ("inc", "missing", "corrupt")
+    ]
+    store._conn.execute(
+        "UPDATE schedules SET fn = 'tests.testing:missing' WHERE key = 'missing'"
+    )
+    store._conn.execute("UPDATE schedules SET args = x'00' WHERE key = 'corrupt'")
+    store._conn.commit()
+    for f in fs:
+        assert f.cancel() is True
+    executor.shutdown(wait=False)
+    store.close()
+
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, path)
+    fs = store.restore()
+    assert list(fs) == ["inc"]
+    assert "'missing'" in caplog.text and "'corrupt'" in caplog.text
+
+
+def test_schedule_should_raise_when_key_scheduled_concurrently(tmp_path):
+    executor = executors.ThreadPoolExecutor()
+    store = executors.ScheduleStore(executor, str(tmp_path / "schedules.db"))
+    barrier = threading.Barrier(8)
+    fs, errors = [], []
+
+    def schedule():
+        barrier.wait()
+        try:
+            fs.append(store.schedule("echo", 10.0, testing.echo, 1, **kwargs))
+        except ValueError as e:
+            errors.append(e)
+
+    kwargs = {
+        "mode": testing.TestMode.THREAD,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    threads = [threading.Thread(target=schedule) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fs) == 1 and len(errors) == 7
+    assert store.remove("echo") is True
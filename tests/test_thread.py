@@ -5,6 +5,7 @@ import os
 import random
 import threading
 import time
+from concurrent import futures
 
 import pytest
 
@@ -148,3 +149,135 @@ def test_schedule_at_fixed_delay_should_raise_when_negative_delay():
             pid=os.getpid(),
             tid=threading.get_ident(),
         )
+
+
+def test_schedule_should_raise_when_execution_timeout_exceeded():
+    executor = executors.ThreadPoolExecutor()
+    f = executor.schedule(
+        0.0,
+        testing.echo,
+        random.random(),
+        execution_timeout=0.2,
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    with pytest.raises(executors.ExecutionTimeoutError):
+        f.result()
+    assert executor.overrun_count == 1
+
+
+def test_schedule_at_fixed_rate_should_skip_overrunning_run():
+    counter = testing.Counter()
+    executor = executors.ThreadPoolExecutor(2)
+    f = executor.schedule_at_fixed_rate(
+        0.0,
+        0.5,
+        testing.hang_once,
+        counter,
+        1.2,
+        execution_timeout=0.3,
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    time.sleep(2.2)
+    assert f.cancel() is True
+    # the overrunning run, and the runs at 0.5 and 1.0 while it hung.
+    assert executor.overrun_count == 3
+    assert counter.value() == 3
+
+
+def test_schedule_at_fixed_rate_should_hold_one_thread_when_hung():
+    x = random.random()
+    executor = executors.ThreadPoolExecutor(2)
+    kwargs = {
+        "mode": testing.TestMode.THREAD,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    f = executor.schedule_at_fixed_rate(
+        0.0, 0.1, testing.hang, 3.0, execution_timeout=0.2, **kwargs
+    )
+    time.sleep(1.0)
+    assert executor.submit(testing.echo, x, **kwargs).result(timeout=2.0) == x
+    assert executor.overrun_count == 1
+    assert f.cancel() is True
+
+
+def test_schedule_at_fixed_rate_should_not_accumulate_disarmed_deadlines():
+    # pylint:disable=protected-access
+    counter = testing.Counter()
+    executor = executors.ThreadPoolExecutor()
+    f = executor.schedule_at_fixed_rate(
+        0.0,
+        0.01,
+        counter.inc,
+        execution_timeout=60.0,
+    )
+    time.sleep(1.5)
+    assert f.cancel() is True
+    assert counter.value() > 100
+    assert executor._watchdog._queue.qsize() <= 2 * 64
+
+
+def test_schedule_after():
+    x = random.random()
+    executor = executors.ThreadPoolExecutor(2)
+    kwargs = {
+        "mode": testing.TestMode.THREAD,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    upstream1 = executor.submit(testing.echo, x, **kwargs)
+    upstream2 = executor.schedule(1.0, testing.echo, x, **kwargs)
+    t = time.time()
+    f = executor.schedule_after([upstream1, upstream2], 0.5, testing.echo, x, **kwargs)
+    assert executor.queued_task_count == 1
+    g = executor.schedule_after([f], 0.0, testing.echo, x, **kwargs)
+    assert g.result() == x
+    assert time.time() >= t + 2.5
+    assert upstream2.done() and f.done()
+
+
+def test_schedule_after_should_fail_when_upstream_failed():
+    executor = executors.ThreadPoolExecutor()
+    upstream = executor.submit(
+        testing.echo, 0.0, mode=testing.TestMode.THREAD, pid=0, tid=0
+    )
+    f = executor.schedule_after(
+        [upstream],
+        0.0,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    with pytest.raises(AssertionError):
+        f.result()
+
+
+def test_schedule_after_should_be_cancelled_when_upstream_cancelled():
+    executor = executors.ThreadPoolExecutor()
+    upstream = executor.schedule(
+        10.0,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    f = executor.schedule_after(
+        [upstream],
+        0.0,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    assert upstream.cancel() is True
+    assert f.cancelled()
+    done, _ = futures.wait([f], timeout=1.0)
+    assert done == {f}
@@ -0,0 +1,83 @@
+"""Tests Tracer."""
+
+import io
+import json
+import os
+import random
+import threading
+
+import pytest
+
+import scheduledexecutor as executors
+from tests import testing
+
+
+def test_thread_pool_executor():
+    tracer = executors.Tracer()
+    executor = executors.ThreadPoolExecutor()
+    executor.tracer = tracer
+    f = executor.schedule(
+        0.1,
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.THREAD,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    f.result()
+    executor.shutdown()
+
+    events = [e for e in tracer.events() if e["ph"] != "M"]
+    assert [e["cat"] for e in events] == ["enqueue", "due", "dequeue", "run"]
+    enqueue, due, dequeue, run = events
+    assert len({e["args"]["task_id"] for e in events}) == 1
+    assert due["ts"] > enqueue["ts"]
+    assert dequeue["ts"] >= due["ts"]
+    assert run["ph"] == "X" and run["name"] == "echo"
+    assert run["dur"] >= 0.5e6
+
+
+def test_process_pool_executor():
+    tracer = executors.Tracer()
+    executor = executors.ProcessPoolExecutor()
+    executor.tracer = tracer
+    f = executor.submit(
+        testing.echo,
+        random.random(),
+        mode=testing.TestMode.PROCESS,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
+    f.result()
+
+    events = [e for e in tracer.events() if e["ph"] != "M"]
+    assert len({e["args"]["task_id"] for e in events}) == 1
+    cats = [e["cat"] for e in events]
+    assert cats == [
+        "enqueue",
+        "due",
+        "dequeue",
+        "dispatch",
+        "run",
+        "process",
+        "process",
+    ]
+
+
+def test_dump_should_keep_last_events_only():
+    tracer = executors.Tracer(capacity=2)
+    for i in range(3):
+        tracer.record(executors.ENQUEUE, i, testing.echo)
+
+    fp = io.StringIO()
+    tracer.dump(fp)
+    trace = json.loads(fp.getvalue())
+    assert [e["args"]["task_id"] for e in trace["traceEvents"] if e["ph"] == "i"] == [
+        1,
+        2,
+    ]
+
+
+def test_init_should_raise_when_non_positive_capacity():
+    with pytest.raises(ValueError):
+        executors.Tracer(capacity=0)
@@ -47,3 +47,25 @@ def inc(counter: Counter, *, mode: TestMode, pid: int, tid: int):
     validate_run_mode(mode, pid, tid)
     time.sleep(0.5)
     counter.inc()
+
+
+def hang_once(counter: Counter, seconds: float, *, mode: TestMode, pid: int, tid: int):
+    validate_run_mode(mode, pid, tid)
+    counter.inc()
+    if counter.value() == 1:
+        time.sleep(seconds)
+
+
+def hang(seconds: float, *, mode: TestMode, pid: int, tid: int):
+    validate_run_mode(mode, pid, tid)
+    time.sleep(seconds)
+
+
+class UnpicklableError(Exception):
+    def __init__(self):
+        super().__init__()
+        self.fn = lambda: None
+
+
+def raise_unpicklable():
+    raise UnpicklableError()